@@ -0,0 +1,33 @@
+"""Point booking.barber_id at the barber profile
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-14 05:13:13
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_constraint("booking_barber_id_fkey", "booking", type_="foreignkey")
+    # Rewrite the stored user ids to the matching barber profile ids
+    op.execute(
+        "UPDATE booking SET barber_id = (SELECT id FROM barber WHERE user_id = booking.barber_id)"
+    )
+    op.create_foreign_key("booking_barber_id_fkey", "booking", "barber", ["barber_id"], ["id"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("booking_barber_id_fkey", "booking", type_="foreignkey")
+    op.execute(
+        "UPDATE booking SET barber_id = (SELECT user_id FROM barber WHERE id = booking.barber_id)"
+    )
+    op.create_foreign_key("booking_barber_id_fkey", "booking", "user", ["barber_id"], ["id"])
@@ -0,0 +1,41 @@
+"""Enforce non-overlapping active bookings per barber
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-14 05:15:02
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The B-tree equality operator on barber_id inside a GiST index needs btree_gist
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.execute(
+        "ALTER TABLE booking ADD COLUMN IF NOT EXISTS end_at TIMESTAMP WITHOUT TIME ZONE "
+        "GENERATED ALWAYS AS (appointment_date + make_interval(mins => duration_minutes)) STORED"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_booking_barber_status_time "
+        "ON booking (barber_id, status, appointment_date, end_at)"
+    )
+    op.create_exclude_constraint(
+        "excl_booking_barber_overlap",
+        "booking",
+        ("barber_id", "="),
+        (sa.func.tsrange(sa.column("appointment_date"), sa.column("end_at")), "&&"),
+        using="gist",
+        where=sa.text("status IN ('PENDING', 'CONFIRMED')")
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("excl_booking_barber_overlap", "booking")
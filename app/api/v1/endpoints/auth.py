@@ -1,8 +1,8 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.core.deps import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.deps import get_auth_service, get_db, unauthorized
 from app.core.security import verify_refresh_token
 from app.schemas.user import UserCreate, User, Token
 from app.services.auth_service import AuthService
@@ -11,31 +11,27 @@ router = APIRouter()
 
 
 @router.post("/register", response_model=User)
-def register(
+async def register(
     user_create: UserCreate,
-    db: Session = Depends(get_db)
+    auth_service: AuthService = Depends(get_auth_service),
+    db: AsyncSession = Depends(get_db)
 ):
     """Register a new user"""
-    auth_service = AuthService(db)
-    user = auth_service.create_user(user_create)
+    user = await auth_service.create_user(db, user_create)
     return user
 
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    auth_service: AuthService = Depends(get_auth_service),
+    db: AsyncSession = Depends(get_db)
 ):
     """Login user and return access token"""
-    auth_service = AuthService(db)
-    user = auth_service.authenticate_user(form_data.username, form_data.password)
+    user = await auth_service.authenticate_user(db, form_data.username, form_data.password)
     
     if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise unauthorized("Incorrect email or password")
     
     if not user.is_active:
         raise HTTPException(
@@ -47,35 +43,26 @@ def login(
 
 
 @router.post("/refresh", response_model=Token)
-def refresh_token(
+async def refresh_token(
     refresh_token: str,
-    db: Session = Depends(get_db)
+    auth_service: AuthService = Depends(get_auth_service),
+    db: AsyncSession = Depends(get_db)
 ):
     """Refresh access token using refresh token"""
-    auth_service = AuthService(db)
-    
     # Verify refresh token
     email = verify_refresh_token(refresh_token)
     if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid refresh token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise unauthorized("Invalid refresh token")
     
     # Get user
-    user = auth_service.get_user_by_email(email)
+    user = await auth_service.get_user_by_email(db, email)
     if not user or not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found or inactive",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise unauthorized("User not found or inactive")
     
     return auth_service.create_tokens(user)
 
 
 @router.post("/logout")
-def logout():
+async def logout():
     """Logout user (client should discard tokens)"""
     return {"message": "Successfully logged out"} 
\ No newline at end of file
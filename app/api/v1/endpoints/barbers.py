@@ -1,25 +1,37 @@
-from typing import List, Optional
+import hashlib
+import json
+from typing import List
+import numpy as np
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import exists, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
+from app.core.cache import get_json, set_json, namespace_key, invalidate_namespace
+from app.core.config import settings
 from app.core.deps import get_current_active_user, get_current_barber, get_db
-from app.models.user import User
+from app.core.geo import haversine_km
+from app.db.session import after_commit, debug_query_options
+from app.models.user import User, location_point
 from app.models.barber import Barber, Review
-from app.schemas.barber import BarberCreate, BarberUpdate, Barber as BarberSchema, ReviewCreate, Review as ReviewSchema, BarberSearchParams
-from app.services.auth_service import AuthService
+from app.schemas.barber import BarberCreate, BarberUpdate, Barber as BarberSchema, ReviewCreate, Review as ReviewSchema
+from app.schemas.params import BarberSearchParams
 
 router = APIRouter()
 
+SEARCH_CACHE_NAMESPACE = "barber_search:v1"
+
 
 @router.post("/profile", response_model=BarberSchema)
-def create_barber_profile(
+async def create_barber_profile(
     barber_create: BarberCreate,
     current_user: User = Depends(get_current_barber),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create barber profile"""
     # Check if barber profile already exists
-    existing_profile = db.query(Barber).filter(Barber.user_id == current_user.id).first()
-    if existing_profile:
+    result = await db.execute(select(exists().where(Barber.user_id == current_user.id)))
+    if result.scalar():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Barber profile already exists"
@@ -36,18 +48,19 @@ def create_barber_profile(
     )
     
     db.add(db_barber)
-    db.commit()
-    db.refresh(db_barber)
+    await db.flush()
+    after_commit(db, invalidate_namespace, SEARCH_CACHE_NAMESPACE)
     return db_barber
 
 
 @router.get("/profile", response_model=BarberSchema)
-def get_barber_profile(
+async def get_barber_profile(
     current_user: User = Depends(get_current_barber),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get current barber profile"""
-    barber = db.query(Barber).filter(Barber.user_id == current_user.id).first()
+    result = await db.execute(select(Barber).where(Barber.user_id == current_user.id))
+    barber = result.scalars().first()
     if not barber:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -57,70 +70,97 @@ def get_barber_profile(
 
 
 @router.put("/profile", response_model=BarberSchema)
-def update_barber_profile(
+async def update_barber_profile(
     barber_update: BarberUpdate,
     current_user: User = Depends(get_current_barber),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update barber profile"""
-    barber = db.query(Barber).filter(Barber.user_id == current_user.id).first()
+    result = await db.execute(select(Barber).where(Barber.user_id == current_user.id))
+    barber = result.scalars().first()
     if not barber:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Barber profile not found"
         )
     
-    update_data = barber_update.dict(exclude_unset=True)
+    update_data = barber_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(barber, field, value)
     
-    db.commit()
-    db.refresh(barber)
+    await db.flush()
+    after_commit(db, invalidate_namespace, SEARCH_CACHE_NAMESPACE)
     return barber
 
 
 @router.get("/search", response_model=List[BarberSchema])
-def search_barbers(
-    latitude: Optional[float] = Query(None, description="Latitude for location-based search"),
-    longitude: Optional[float] = Query(None, description="Longitude for location-based search"),
-    radius_km: float = Query(10.0, description="Search radius in kilometers"),
-    service: Optional[str] = Query(None, description="Service to search for"),
-    min_rating: Optional[float] = Query(None, description="Minimum rating"),
-    max_price: Optional[float] = Query(None, description="Maximum price"),
-    db: Session = Depends(get_db)
+async def search_barbers(
+    params: BarberSearchParams = Query(),
+    db: AsyncSession = Depends(get_db)
 ):
     """Search for barbers with filters"""
-    query = db.query(Barber).join(User).filter(User.is_active == True, Barber.is_available == True)
+    params_hash = hashlib.blake2b(
+        json.dumps(params.model_dump(), sort_keys=True).encode(), digest_size=16
+    ).hexdigest()
+    cache_key = await namespace_key(SEARCH_CACHE_NAMESPACE, params_hash)
+    cached = await get_json(cache_key)
+    if cached is not None:
+        return cached
+    
+    latitude, longitude, radius_km = params.latitude, params.longitude, params.radius_km
+    query = select(Barber).join(Barber.user).options(
+        contains_eager(Barber.user), *debug_query_options()
+    ).where(
+        User.is_active == True, Barber.is_available == True
+    )
     
-    # Filter by service if provided
-    if service:
-        query = query.filter(Barber.services.contains([service]))
+    # Filter by service if provided (services is keyed by service name; the
+    # JSONB ? operator is served by ix_barber_services_gin)
+    if params.service:
+        query = query.where(Barber.services.has_key(params.service))
     
     # Filter by minimum rating
-    if min_rating:
-        query = query.filter(Barber.rating >= min_rating)
+    if params.min_rating:
+        query = query.where(Barber.rating >= params.min_rating)
     
     # Filter by maximum price (assuming hourly_rate is stored)
-    if max_price:
-        query = query.join(User).filter(User.hourly_rate <= max_price)
+    if params.max_price:
+        query = query.where(User.hourly_rate <= params.max_price)
+    
+    # Location-based filtering
+    by_location = latitude is not None and longitude is not None
+    if by_location and settings.postgis_enabled:
+        origin = location_point(longitude, latitude)
+        barber_location = location_point(User.longitude, User.latitude)
+        query = query.where(
+            func.ST_DWithin(barber_location, origin, radius_km * 1000)
+        ).order_by(func.ST_Distance(barber_location, origin))
+    elif by_location:
+        query = query.where(User.latitude.isnot(None), User.longitude.isnot(None))
     
-    # Location-based filtering (simplified - in production, use proper geospatial queries)
-    if latitude and longitude:
-        # This is a simplified distance calculation
-        # In production, use PostGIS or similar for proper geospatial queries
-        pass
+    result = await db.execute(query)
+    barbers = result.scalars().all()
     
-    barbers = query.all()
-    return barbers
+    # Without PostGIS, compute distances for all candidates in one vectorized pass
+    if by_location and not settings.postgis_enabled and barbers:
+        lats = np.fromiter((b.user.latitude for b in barbers), dtype=np.float64, count=len(barbers))
+        lons = np.fromiter((b.user.longitude for b in barbers), dtype=np.float64, count=len(barbers))
+        distances = haversine_km(latitude, longitude, lats, lons)
+        barbers = [barbers[i] for i in np.argsort(distances) if distances[i] <= radius_km]
+    
+    results = [BarberSchema.model_validate(barber).model_dump(mode="json") for barber in barbers]
+    await set_json(cache_key, results, settings.search_cache_ttl)
+    return results
 
 
 @router.get("/{barber_id}", response_model=BarberSchema)
-def get_barber_by_id(
+async def get_barber_by_id(
     barber_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get barber by ID"""
-    barber = db.query(Barber).filter(Barber.id == barber_id).first()
+    result = await db.execute(select(Barber).where(Barber.id == barber_id))
+    barber = result.scalars().first()
     if not barber:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -130,34 +170,23 @@ def get_barber_by_id(
 
 
 @router.post("/{barber_id}/reviews", response_model=ReviewSchema)
-def create_review(
+async def create_review(
     barber_id: int,
     review_create: ReviewCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a review for a barber"""
     # Check if barber exists
-    barber = db.query(Barber).filter(Barber.id == barber_id).first()
+    result = await db.execute(select(Barber).where(Barber.id == barber_id))
+    barber = result.scalars().first()
     if not barber:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Barber not found"
         )
     
-    # Check if user has already reviewed this barber
-    existing_review = db.query(Review).filter(
-        Review.barber_id == barber_id,
-        Review.customer_id == current_user.id
-    ).first()
-    
-    if existing_review:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You have already reviewed this barber"
-        )
-    
-    # Create review
+    # Create review; uq_review_barber_customer rejects a second review
     db_review = Review(
         barber_id=barber_id,
         customer_id=current_user.id,
@@ -166,24 +195,35 @@ def create_review(
     )
     
     db.add(db_review)
-    db.commit()
-    db.refresh(db_review)
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You have already reviewed this barber"
+        )
     
-    # Update barber rating
-    reviews = db.query(Review).filter(Review.barber_id == barber_id).all()
-    total_rating = sum(review.rating for review in reviews)
-    barber.rating = total_rating / len(reviews)
-    barber.total_reviews = len(reviews)
-    db.commit()
+    # Update barber rating (aggregate in the database, not over loaded rows)
+    result = await db.execute(select(
+        func.avg(Review.rating), func.count(Review.id)
+    ).where(Review.barber_id == barber_id))
+    avg_rating, total_reviews = result.one()
+    barber.rating = float(avg_rating)
+    barber.total_reviews = total_reviews
+    await db.flush()
     
     return db_review
 
 
 @router.get("/{barber_id}/reviews", response_model=List[ReviewSchema])
-def get_barber_reviews(
+async def get_barber_reviews(
     barber_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all reviews for a barber"""
-    reviews = db.query(Review).filter(Review.barber_id == barber_id).all()
-    return reviews 
\ No newline at end of file
+    # ReviewSchema only exposes FK ids; raiseload in debug flags any lazy load
+    result = await db.execute(select(Review).options(*debug_query_options()).where(
+        Review.barber_id == barber_id
+    ))
+    return result.scalars().all() 
\ No newline at end of file
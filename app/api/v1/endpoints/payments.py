@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Header
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from app.core.deps import get_current_active_user, get_db
 from app.models.user import User
 from app.schemas.booking import PaymentIntentCreate, PaymentIntentResponse
@@ -10,20 +12,21 @@ router = APIRouter()
 
 
 @router.post("/create-payment-intent", response_model=PaymentIntentResponse)
-def create_payment_intent(
+async def create_payment_intent(
     payment_data: PaymentIntentCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a payment intent for a booking"""
     payment_service = PaymentService(db)
     
     # Verify that the booking belongs to the current user
     from app.models.booking import Booking
-    booking = db.query(Booking).filter(
+    result = await db.execute(select(Booking).where(
         Booking.id == payment_data.booking_id,
         Booking.customer_id == current_user.id
-    ).first()
+    ))
+    booking = result.scalars().first()
     
     if not booking:
         raise HTTPException(
@@ -37,8 +40,8 @@ def create_payment_intent(
             detail="Booking is already paid"
         )
     
-    result = payment_service.create_payment_intent(
-        payment_data.booking_id,
+    result = await payment_service.create_payment_intent(
+        booking,
         payment_data.amount,
         payment_data.currency
     )
@@ -50,14 +53,14 @@ def create_payment_intent(
 
 
 @router.post("/confirm-payment")
-def confirm_payment(
+async def confirm_payment(
     payment_intent_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Confirm a payment"""
     payment_service = PaymentService(db)
-    booking = payment_service.confirm_payment(payment_intent_id)
+    booking = await payment_service.confirm_payment(payment_intent_id)
     
     return {
         "message": "Payment confirmed successfully",
@@ -70,7 +73,7 @@ def confirm_payment(
 async def stripe_webhook(
     request: Request,
     stripe_signature: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Handle Stripe webhooks"""
     if not stripe_signature:
@@ -79,11 +82,17 @@ async def stripe_webhook(
             detail="Missing Stripe signature"
         )
     
-    payload = await request.body()
     payment_service = PaymentService(db)
+    verifier = payment_service.webhook_verifier(stripe_signature)
+    
+    # Verify the signature as the body streams in instead of after buffering it
+    chunks = []
+    async for chunk in request.stream():
+        verifier.update(chunk)
+        chunks.append(chunk)
     
     try:
-        result = payment_service.process_webhook(payload, stripe_signature)
+        result = await payment_service.process_webhook(b"".join(chunks), verifier)
         return result
     except Exception as e:
         raise HTTPException(
@@ -93,15 +102,15 @@ async def stripe_webhook(
 
 
 @router.post("/{booking_id}/refund")
-def refund_payment(
+async def refund_payment(
     booking_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Refund a payment (barber only)"""
     # Check if user is the barber for this booking
     from app.models.booking import Booking
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    booking = await db.get(Booking, booking_id, options=[joinedload(Booking.barber)])
     
     if not booking:
         raise HTTPException(
@@ -109,14 +118,14 @@ def refund_payment(
             detail="Booking not found"
         )
     
-    if booking.barber_id != current_user.id:
+    if booking.barber.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only the barber can refund payments"
         )
     
     payment_service = PaymentService(db)
-    result = payment_service.refund_payment(booking_id)
+    result = await payment_service.refund_payment(booking)
     
     return {
         "message": "Payment refunded successfully",
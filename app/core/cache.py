@@ -0,0 +1,57 @@
+import logging
+from typing import Any, Optional
+import orjson
+import redis
+import redis.asyncio as aioredis
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+redis_client = aioredis.Redis.from_url(settings.redis_url, decode_responses=True)
+
+
+async def get_json(key: str) -> Optional[Any]:
+    """Return the cached JSON value for key, or None on a miss or Redis error."""
+    try:
+        cached = await redis_client.get(key)
+    except redis.RedisError:
+        return None
+    return orjson.loads(cached) if cached is not None else None
+
+
+async def set_json(key: str, value: Any, ttl: int) -> None:
+    """Cache value as JSON; Redis errors are ignored, since the cache is optional."""
+    try:
+        payload = orjson.dumps(value)
+    except orjson.JSONEncodeError:
+        # A caller bug, not an outage: the key would never be cached
+        logger.warning("Not caching %s: value is not JSON-serializable", key, exc_info=True)
+        return
+    try:
+        await redis_client.set(key, payload, ex=ttl)
+    except redis.RedisError:
+        pass
+
+
+async def delete_keys(*keys: str) -> None:
+    try:
+        await redis_client.delete(*keys)
+    except redis.RedisError:
+        pass
+
+
+async def namespace_key(namespace: str, digest: str) -> str:
+    """Build a cache key scoped to the namespace's current generation."""
+    try:
+        generation = await redis_client.get(f"{namespace}:gen") or "0"
+    except redis.RedisError:
+        generation = "0"
+    return f"{namespace}:{generation}:{digest}"
+
+
+async def invalidate_namespace(namespace: str) -> None:
+    """Orphan every key in the namespace by bumping its generation."""
+    try:
+        await redis_client.incr(f"{namespace}:gen")
+    except redis.RedisError:
+        pass
\ No newline at end of file
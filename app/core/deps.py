@@ -1,39 +1,51 @@
-from typing import Generator, Optional
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.security import verify_token
 from app.db.session import get_db
 from app.models.user import User
-from app.services.auth_service import AuthService
+from app.services.auth_service import AuthService, auth_service
 
 security = HTTPBearer()
 
+# Shared by every 401 response; never mutated by the exception handler
+BEARER_HEADERS = {"WWW-Authenticate": "Bearer"}
 
-def get_current_user(
-    db: Session = Depends(get_db),
+
+def unauthorized(detail: str = "Could not validate credentials") -> HTTPException:
+    # A fresh instance per raise: a raised exception accumulates its
+    # traceback and context, so it cannot be shared across requests.
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers=BEARER_HEADERS,
+    )
+
+
+def get_auth_service() -> AuthService:
+    return auth_service
+
+
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> User:
     token = credentials.credentials
-    username = verify_token(token)
-    if username is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    claims = verify_token(token)
+    if claims is None or "uid" not in claims:
+        raise unauthorized()
     
-    user = AuthService(db).get_user_by_email(username)
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    return user
+    # Detached snapshot from the signed claims; use get_current_user_record
+    # when the full row is needed.
+    return User(
+        id=claims["uid"],
+        email=claims["sub"],
+        is_active=claims.get("act", False),
+        is_barber=claims.get("br", False)
+    )
 
 
-def get_current_active_user(
+async def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
     if not current_user.is_active:
@@ -44,7 +56,7 @@ def get_current_active_user(
     return current_user
 
 
-def get_current_barber(
+async def get_current_barber(
     current_user: User = Depends(get_current_user),
 ) -> User:
     if not current_user.is_barber:
@@ -55,7 +67,7 @@ def get_current_barber(
     return current_user
 
 
-def get_current_customer(
+async def get_current_customer(
     current_user: User = Depends(get_current_user),
 ) -> User:
     if current_user.is_barber:
@@ -63,4 +75,15 @@ def get_current_customer(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Barbers cannot access customer endpoints"
         )
-    return current_user 
\ No newline at end of file
+    return current_user 
+
+
+async def get_current_user_record(
+    current_user: User = Depends(get_current_active_user),
+    auth_service: AuthService = Depends(get_auth_service),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    user = await auth_service.get_user_by_id(db, current_user.id)
+    if user is None or not user.is_active:
+        raise unauthorized("User not found")
+    return user
\ No newline at end of file
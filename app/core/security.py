@@ -1,14 +1,30 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
-from typing import Optional, Union, Any
+from typing import Optional, Tuple, Union, Any, Dict
+from cachetools import TTLCache
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Argon2id for new hashes; existing bcrypt hashes still verify and are
+# upgraded on the next successful login.
+# Verified access token claims keyed by a digest of the token, so repeat
+# requests with the same token skip the signature check until it expires.
+_token_cache = TTLCache(maxsize=4096, ttl=60)
+
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__time_cost=2,
+    argon2__memory_cost=19456,
+    argon2__parallelism=1
+)
 
 
 def create_access_token(
-    subject: Union[str, Any], expires_delta: timedelta = None
+    subject: Union[str, Any], expires_delta: timedelta = None, claims: Optional[Dict[str, Any]] = None
 ) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -16,7 +32,7 @@ def create_access_token(
         expire = datetime.utcnow() + timedelta(
             minutes=settings.access_token_expire_minutes
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject)}
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
@@ -37,17 +53,30 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password and return a replacement hash if the scheme is outdated."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def verify_token(token: str) -> Optional[str]:
+def verify_token(token: str) -> Optional[Dict[str, Any]]:
+    """Return the verified access token claims, or None if the token is invalid."""
+    cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    payload = _token_cache.get(cache_key)
+    if payload is not None:
+        if payload["exp"] > time.time():
+            return payload
+        _token_cache.pop(cache_key, None)
+
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        username: str = payload.get("sub")
-        if username is None:
+        if payload.get("sub") is None or "exp" not in payload:
             return None
-        return username
+        _token_cache[cache_key] = payload
+        return payload
     except JWTError:
         return None
 
@@ -1,16 +1,19 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
 from app.core.config import settings
 
-engine = create_engine(
-    settings.database_url,
+# One engine per process. Each asyncpg connection keeps its own prepared
+# statement cache, so a warm pool reuses server-side plans for repeated
+# query shapes such as the stripe_payment_intent_id lookups.
+engine = create_async_engine(
+    settings.async_database_url,
     pool_pre_ping=True,
     pool_recycle=300,
-    pool_size=10,
-    max_overflow=20
+    pool_size=20,
+    max_overflow=10,
+    query_cache_size=1200
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
-Base = declarative_base() 
\ No newline at end of file
+Base = declarative_base()
\ No newline at end of file
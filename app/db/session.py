@@ -1,11 +1,32 @@
-from typing import Generator
-from sqlalchemy.orm import Session
+from typing import Any, AsyncGenerator, Awaitable, Callable
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
+from app.core.config import settings
 from app.db.database import SessionLocal
 
 
-def get_db() -> Generator[Session, None, None]:
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close() 
\ No newline at end of file
+def debug_query_options() -> tuple:
+    """Query options that turn unexpected lazy loads into errors in debug mode."""
+    return (raiseload("*"),) if settings.debug else ()
+
+
+def after_commit(db: AsyncSession, callback: Callable[..., Awaitable[Any]], *args: Any) -> None:
+    """Run callback(*args) once get_db has committed the request's transaction.
+
+    Cache invalidation goes here: done before the commit, a concurrent reader
+    could repopulate the cache from the rows being replaced.
+    """
+    db.info.setdefault("after_commit", []).append((callback, args))
+
+
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    # One transaction per request: services flush, the commit happens here
+    async with SessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        for callback, args in db.info.pop("after_commit", ()):
+            await callback(*args)
\ No newline at end of file
@@ -1,12 +1,21 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.core.config import settings
 from app.api.v1.api import api_router
 from app.db.database import engine
 from app.models import base, user, barber, booking
 
-# Create database tables
-base.Base.metadata.create_all(bind=engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create database tables
+    async with engine.begin() as conn:
+        await conn.run_sync(base.Base.metadata.create_all)
+    yield
+    await engine.dispose()
+
 
 app = FastAPI(
     title=settings.app_name,
@@ -14,13 +23,15 @@ app = FastAPI(
     description="A comprehensive barber marketplace API",
     openapi_url="/openapi.json",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.allowed_origins,
+    allow_origins=settings.allowed_origins_set,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -31,7 +42,7 @@ app.include_router(api_router, prefix="/api/v1")
 
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {
         "message": "Welcome to Barber Marketplace API",
         "version": "1.0.0",
@@ -41,7 +52,7 @@ def read_root():
 
 
 @app.get("/health")
-def health_check():
+async def health_check():
     return {"status": "healthy", "message": "API is running"}
 
 
@@ -1,13 +1,19 @@
-from sqlalchemy import Column, String, Text, Float, Integer, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, String, Text, Float, Integer, ForeignKey, JSON, Boolean, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
 
 class Barber(BaseModel):
+    __table_args__ = (
+        Index("ix_barber_available_rating", "is_available", "rating"),
+        Index("ix_barber_services_gin", "services", postgresql_using="gin"),
+    )
+
     user_id = Column(Integer, ForeignKey("user.id"), unique=True, nullable=False)
     shop_name = Column(String(200), nullable=True)
     specialties = Column(JSON, nullable=True)  # List of specialties
-    services = Column(JSON, nullable=True)  # List of services with prices
+    services = Column(JSONB, nullable=True)  # Services with prices; JSONB so GIN can index containment
     working_hours = Column(JSON, nullable=True)  # Working hours for each day
     rating = Column(Float, default=0.0, nullable=False)
     total_reviews = Column(Integer, default=0, nullable=False)
@@ -16,12 +22,18 @@ class Barber(BaseModel):
     # Relationships
     user = relationship("User", back_populates="barber_profile")
     reviews = relationship("Review", back_populates="barber")
+    bookings = relationship("Booking", back_populates="barber")
     
     def __repr__(self):
         return f"<Barber(id={self.id}, user_id={self.user_id}, shop_name='{self.shop_name}')>"
 
 
 class Review(BaseModel):
+    # Also serves barber_id lookups as the leading column
+    __table_args__ = (
+        UniqueConstraint("barber_id", "customer_id", name="uq_review_barber_customer"),
+    )
+
     barber_id = Column(Integer, ForeignKey("barber.id"), nullable=False)
     customer_id = Column(Integer, ForeignKey("user.id"), nullable=False)
     rating = Column(Integer, nullable=False)  # 1-5 stars
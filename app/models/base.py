@@ -1,16 +1,20 @@
-from datetime import datetime
 from sqlalchemy import Column, Integer, DateTime
 from sqlalchemy.ext.declarative import declared_attr
+from sqlalchemy.sql import func
 from app.db.database import Base
 
 
 class BaseModel(Base):
     __abstract__ = True
+    # Fetch the server-stamped timestamps via RETURNING instead of a reload
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # onupdate with a SQL expression puts now() in the UPDATE itself; server_onupdate
+    # alone would only declare a trigger that does not exist
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     @declared_attr
     def __tablename__(cls):
-        return cls.__name__.lower() 
\ No newline at end of file
+        return cls.__name__.lower()
\ No newline at end of file
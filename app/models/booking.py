@@ -1,5 +1,6 @@
 from datetime import datetime
-from sqlalchemy import Column, String, Text, Float, Integer, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Computed, String, Text, Float, Integer, ForeignKey, DateTime, Enum, Index, DDL, event, func
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 from sqlalchemy.orm import relationship
 import enum
 from app.models.base import BaseModel
@@ -21,20 +22,46 @@ class PaymentStatus(str, enum.Enum):
 
 
 class Booking(BaseModel):
-    customer_id = Column(Integer, ForeignKey("user.id"), nullable=False)
-    barber_id = Column(Integer, ForeignKey("user.id"), nullable=False)
+    # Covers the overlap/availability range scans; barber_id leads, so it
+    # also serves plain barber_id lookups
+    __table_args__ = (
+        Index("ix_booking_barber_status_time", "barber_id", "status", "appointment_date", "end_at"),
+        Index("ix_booking_status", "status"),
+    )
+
+    customer_id = Column(Integer, ForeignKey("user.id"), nullable=False, index=True)
+    barber_id = Column(Integer, ForeignKey("barber.id"), nullable=False)
     service_name = Column(String(200), nullable=False)
     service_price = Column(Float, nullable=False)
     appointment_date = Column(DateTime, nullable=False)
     duration_minutes = Column(Integer, default=60, nullable=False)
+    end_at = Column(DateTime, Computed("appointment_date + make_interval(mins => duration_minutes)", persisted=True))
     status = Column(Enum(BookingStatus), default=BookingStatus.PENDING, nullable=False)
     payment_status = Column(Enum(PaymentStatus), default=PaymentStatus.PENDING, nullable=False)
     notes = Column(Text, nullable=True)
-    stripe_payment_intent_id = Column(String(255), nullable=True)
+    stripe_payment_intent_id = Column(String(255), unique=True, nullable=True)
     
     # Relationships
     customer = relationship("User", back_populates="bookings_as_customer", foreign_keys=[customer_id])
-    barber = relationship("User", back_populates="bookings_as_barber", foreign_keys=[barber_id])
+    barber = relationship("Barber", back_populates="bookings", foreign_keys=[barber_id])
     
     def __repr__(self):
-        return f"<Booking(id={self.id}, customer_id={self.customer_id}, barber_id={self.barber_id}, status='{self.status}')>" 
\ No newline at end of file
+        return f"<Booking(id={self.id}, customer_id={self.customer_id}, barber_id={self.barber_id}, status='{self.status}')>"
+
+
+# Two active bookings for the same barber may not overlap. tsrange defaults to
+# half-open [start, end) bounds, so back-to-back appointments are allowed.
+Booking.__table__.append_constraint(
+    ExcludeConstraint(
+        (Booking.barber_id, "="),
+        (func.tsrange(Booking.appointment_date, Booking.end_at), "&&"),
+        name="excl_booking_barber_overlap",
+        using="gist",
+        where="status IN ('PENDING', 'CONFIRMED')"
+    )
+)
+event.listen(
+    Booking.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql")
+)
\ No newline at end of file
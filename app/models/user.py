@@ -1,9 +1,25 @@
-from sqlalchemy import Column, String, Boolean, Text, Float, Integer
+from geoalchemy2 import Geography
+from sqlalchemy import Column, String, Boolean, Text, Float, Integer, DDL, Index, cast, event, func, literal_column
 from sqlalchemy.orm import relationship
+from app.core.config import settings
 from app.models.base import BaseModel
 
 
+def location_point(longitude, latitude):
+    """Build a geography(Point, 4326) expression from longitude/latitude."""
+    # The SRID is inlined rather than bound so search queries render the same
+    # expression as ix_user_location_gist and the planner can match the index
+    return cast(
+        func.ST_SetSRID(func.ST_MakePoint(longitude, latitude), literal_column("4326")),
+        Geography(geometry_type="POINT", srid=4326)
+    )
+
+
 class User(BaseModel):
+    __table_args__ = (
+        Index("ix_user_active_hourly_rate", "is_active", "hourly_rate"),
+    )
+
     email = Column(String(255), unique=True, index=True, nullable=False)
     hashed_password = Column(String(255), nullable=False)
     first_name = Column(String(100), nullable=False)
@@ -24,7 +40,29 @@ class User(BaseModel):
     # Relationships
     barber_profile = relationship("Barber", back_populates="user", uselist=False)
     bookings_as_customer = relationship("Booking", back_populates="customer", foreign_keys="Booking.customer_id")
-    bookings_as_barber = relationship("Booking", back_populates="barber", foreign_keys="Booking.barber_id")
+    # Bookings reference the barber profile; hop through it for the user's side
+    bookings_as_barber = relationship(
+        "Booking",
+        secondary="barber",
+        primaryjoin="User.id == Barber.user_id",
+        secondaryjoin="Barber.id == Booking.barber_id",
+        viewonly=True
+    )
     
     def __repr__(self):
-        return f"<User(id={self.id}, email='{self.email}', is_barber={self.is_barber})>" 
\ No newline at end of file
+        return f"<User(id={self.id}, email='{self.email}', is_barber={self.is_barber})>" 
+
+
+if settings.postgis_enabled:
+    # Coordinates live on the user row; index the derived point so
+    # ST_DWithin searches are pruned by GIST instead of a full scan.
+    Index(
+        "ix_user_location_gist",
+        location_point(User.longitude, User.latitude),
+        postgresql_using="gist"
+    )
+    event.listen(
+        User.metadata,
+        "before_create",
+        DDL("CREATE EXTENSION IF NOT EXISTS postgis").execute_if(dialect="postgresql")
+    )
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
@@ -27,8 +27,7 @@ class BarberInDB(BarberBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class Barber(BarberInDB):
@@ -55,19 +54,8 @@ class ReviewInDB(ReviewBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class Review(ReviewInDB):
-    pass
-
-
-class BarberSearchParams(BaseModel):
-    latitude: Optional[float] = None
-    longitude: Optional[float] = None
-    radius_km: Optional[float] = 10.0
-    service: Optional[str] = None
-    min_rating: Optional[float] = None
-    max_price: Optional[float] = None
-    available_date: Optional[datetime] = None 
\ No newline at end of file
+    pass 
\ No newline at end of file
@@ -1,9 +1,16 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, field_validator
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timezone
 from app.models.booking import BookingStatus, PaymentStatus
 
 
+def naive_utc(value: datetime) -> datetime:
+    """Booking times are stored as naive UTC; asyncpg rejects aware values there."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
 class BookingBase(BaseModel):
     service_name: str
     service_price: float
@@ -11,6 +18,11 @@ class BookingBase(BaseModel):
     duration_minutes: int = 60
     notes: Optional[str] = None
 
+    @field_validator("appointment_date")
+    @classmethod
+    def normalize_appointment_date(cls, value: datetime) -> datetime:
+        return naive_utc(value)
+
 
 class BookingCreate(BookingBase):
     barber_id: int
@@ -21,6 +33,11 @@ class BookingUpdate(BaseModel):
     status: Optional[BookingStatus] = None
     notes: Optional[str] = None
 
+    @field_validator("appointment_date")
+    @classmethod
+    def normalize_appointment_date(cls, value: Optional[datetime]) -> Optional[datetime]:
+        return naive_utc(value) if value is not None else None
+
 
 class BookingInDB(BookingBase):
     id: int
@@ -32,8 +49,7 @@ class BookingInDB(BookingBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class Booking(BookingInDB):
@@ -42,7 +58,7 @@ class Booking(BookingInDB):
 
 class BookingWithRelations(Booking):
     customer: "User"  # Forward reference
-    barber: "User"    # Forward reference
+    barber: "Barber"  # Forward reference
 
 
 class BookingStatusUpdate(BaseModel):
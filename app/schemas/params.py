@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class BarberSearchParams(BaseModel):
+    latitude: Optional[float] = Field(None, ge=-90, le=90, description="Latitude for location-based search")
+    longitude: Optional[float] = Field(None, ge=-180, le=180, description="Longitude for location-based search")
+    radius_km: float = Field(10.0, gt=0, le=100, description="Search radius in kilometers")
+    service: Optional[str] = Field(None, description="Service to search for")
+    min_rating: Optional[float] = Field(None, ge=0, le=5, description="Minimum rating")
+    max_price: Optional[float] = Field(None, ge=0, description="Maximum price")
\ No newline at end of file
@@ -1,32 +1,50 @@
-from typing import Optional
-from sqlalchemy.orm import Session
+import hashlib
+import hmac
+from typing import Optional, Tuple
+from cachetools import TTLCache
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash, verify_password, create_access_token, create_refresh_token
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_and_update_password, create_access_token, create_refresh_token
 from fastapi import HTTPException, status
 
+# Recently verified (email, password hash, peppered password) triples, so
+# repeat logins within the TTL skip the password KDF. Only touched from the
+# event loop, so no lock is needed.
+_verified_logins = TTLCache(maxsize=1024, ttl=settings.login_cache_ttl)
+
+
+def _login_cache_key(email: str, hashed_password: str, password: str) -> Tuple[str, str, str]:
+    pepper = (settings.password_pepper or settings.secret_key).encode()
+    peppered = hmac.new(pepper, password.encode(), hashlib.sha256).hexdigest()
+    return email, hashed_password, peppered
+
 
 class AuthService:
-    def __init__(self, db: Session):
-        self.db = db
+    """Stateless user/auth operations; the session is passed to each call."""
 
-    def get_user_by_email(self, email: str) -> Optional[User]:
-        return self.db.query(User).filter(User.email == email).first()
+    async def get_user_by_email(self, db: AsyncSession, email: str) -> Optional[User]:
+        result = await db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
 
-    def get_user_by_id(self, user_id: int) -> Optional[User]:
-        return self.db.query(User).filter(User.id == user_id).first()
+    async def get_user_by_id(self, db: AsyncSession, user_id: int) -> Optional[User]:
+        result = await db.execute(select(User).where(User.id == user_id))
+        return result.scalars().first()
 
-    def create_user(self, user_create: UserCreate) -> User:
+    async def create_user(self, db: AsyncSession, user_create: UserCreate) -> User:
         # Check if user already exists
-        existing_user = self.get_user_by_email(user_create.email)
-        if existing_user:
+        result = await db.execute(select(exists().where(User.email == user_create.email)))
+        if result.scalar():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
 
-        # Create new user
-        hashed_password = get_password_hash(user_create.password)
+        # Create new user (the KDF is CPU-bound, keep it off the event loop)
+        hashed_password = await run_in_threadpool(get_password_hash, user_create.password)
         db_user = User(
             email=user_create.email,
             hashed_password=hashed_password,
@@ -36,21 +54,37 @@ class AuthService:
             is_barber=user_create.is_barber
         )
         
-        self.db.add(db_user)
-        self.db.commit()
-        self.db.refresh(db_user)
+        db.add(db_user)
+        await db.flush()
         return db_user
 
-    def authenticate_user(self, email: str, password: str) -> Optional[User]:
-        user = self.get_user_by_email(email)
+    async def authenticate_user(self, db: AsyncSession, email: str, password: str) -> Optional[User]:
+        user = await self.get_user_by_email(db, email)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+
+        cache_key = _login_cache_key(email, user.hashed_password, password)
+        if cache_key in _verified_logins:
+            return user
+
+        verified, new_hash = await run_in_threadpool(
+            verify_and_update_password, password, user.hashed_password
+        )
+        if not verified:
             return None
+        if new_hash:
+            user.hashed_password = new_hash
+            await db.flush()
+            cache_key = _login_cache_key(email, new_hash, password)
+
+        _verified_logins[cache_key] = True
         return user
 
     def create_tokens(self, user: User):
-        access_token = create_access_token(subject=user.email)
+        access_token = create_access_token(
+            subject=user.email,
+            claims={"uid": user.id, "act": user.is_active, "br": user.is_barber}
+        )
         refresh_token = create_refresh_token(subject=user.email)
         return {
             "access_token": access_token,
@@ -58,24 +92,23 @@ class AuthService:
             "token_type": "bearer"
         }
 
-    def update_user(self, user_id: int, user_update: UserUpdate) -> User:
-        user = self.get_user_by_id(user_id)
+    async def update_user(self, db: AsyncSession, user_id: int, user_update: UserUpdate) -> User:
+        user = await self.get_user_by_id(db, user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
 
-        update_data = user_update.dict(exclude_unset=True)
+        update_data = user_update.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(user, field, value)
 
-        self.db.commit()
-        self.db.refresh(user)
+        await db.flush()
         return user
 
-    def deactivate_user(self, user_id: int) -> User:
-        user = self.get_user_by_id(user_id)
+    async def deactivate_user(self, db: AsyncSession, user_id: int) -> User:
+        user = await self.get_user_by_id(db, user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -83,6 +116,8 @@ class AuthService:
             )
 
         user.is_active = False
-        self.db.commit()
-        self.db.refresh(user)
-        return user 
\ No newline at end of file
+        await db.flush()
+        return user 
+
+
+auth_service = AuthService()
\ No newline at end of file
@@ -1,40 +1,64 @@
-from typing import List, Optional
+import math
+from typing import Iterable, List, Optional, Tuple
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, exists, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from app.core.cache import get_json, set_json, delete_keys
+from app.core.config import settings
+from app.db.session import after_commit, debug_query_options
+from app.models.barber import Barber
 from app.models.booking import Booking, BookingStatus, PaymentStatus
 from app.models.user import User
 from app.schemas.booking import BookingCreate, BookingUpdate
 from fastapi import HTTPException, status
 
+# Availability is cached per (barber, day) as a bitmap of 15-minute slots:
+# bit i is set when any active booking overlaps slot i. The 96-bit mask is
+# stored as a hex string, since JSON integers past 64 bits don't survive orjson.
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+# SQLSTATE exclusion_violation, raised by excl_booking_barber_overlap
+EXCLUSION_VIOLATION = "23P01"
+
+
+def _availability_key(barber_id: int, day: datetime) -> str:
+    return f"avail:{barber_id}:{day:%Y%m%d}"
+
+
+def _slot_mask(start: datetime, end: datetime, start_of_day: datetime) -> int:
+    """Bits for every slot of the day overlapped by the half-open [start, end)."""
+    first = max(0, math.floor((start - start_of_day) / timedelta(minutes=SLOT_MINUTES)))
+    last = min(SLOTS_PER_DAY, math.ceil((end - start_of_day) / timedelta(minutes=SLOT_MINUTES)))
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def _booked_mask(intervals: Iterable[Tuple[datetime, datetime]], start_of_day: datetime) -> int:
+    mask = 0
+    for start, end in intervals:
+        mask |= _slot_mask(start, end, start_of_day)
+    return mask
+
 
 class BookingService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create_booking(self, customer_id: int, booking_create: BookingCreate) -> Booking:
+    async def create_booking(self, customer_id: int, booking_create: BookingCreate) -> Booking:
         # Check if barber exists and is active
-        barber = self.db.query(User).filter(
-            and_(User.id == booking_create.barber_id, User.is_active == True)
-        ).first()
-        
-        if not barber or not barber.is_barber:
+        result = await self.db.execute(select(exists().where(
+            and_(Barber.id == booking_create.barber_id, Barber.user_id == User.id, User.is_active == True)
+        )))
+        if not result.scalar():
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Barber not found or not active"
             )
 
-        # Check if the requested time slot is available
-        if not self._is_time_slot_available(
-            booking_create.barber_id,
-            booking_create.appointment_date,
-            booking_create.duration_minutes
-        ):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Requested time slot is not available"
-            )
-
         # Create booking
         db_booking = Booking(
             customer_id=customer_id,
@@ -48,22 +72,46 @@ class BookingService:
             payment_status=PaymentStatus.PENDING
         )
 
+        # excl_booking_barber_overlap rejects a slot that overlaps an active
+        # booking, so there is no check-then-insert race. eager_defaults reads
+        # id, timestamps and end_at back via RETURNING; get_db commits.
         self.db.add(db_booking)
-        self.db.commit()
-        self.db.refresh(db_booking)
+        try:
+            await self.db.flush()
+        except IntegrityError as e:
+            if getattr(e.orig, "sqlstate", None) != EXCLUSION_VIOLATION:
+                raise
+            await self.db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Requested time slot is not available"
+            )
+        self._invalidate_availability(db_booking)
         return db_booking
 
-    def get_booking_by_id(self, booking_id: int) -> Optional[Booking]:
-        return self.db.query(Booking).filter(Booking.id == booking_id).first()
+    async def get_booking_by_id(self, booking_id: int) -> Optional[Booking]:
+        # Identity-map lookup; the barber profile carries the user_id the
+        # access checks compare against
+        return await self.db.get(Booking, booking_id, options=[joinedload(Booking.barber)])
 
-    def get_user_bookings(self, user_id: int, as_customer: bool = True) -> List[Booking]:
+    async def get_user_bookings(self, user_id: int, as_customer: bool = True) -> List[Booking]:
+        # BookingSchema only exposes FK ids; raiseload in debug flags any lazy load
+        query = select(Booking).options(*debug_query_options())
         if as_customer:
-            return self.db.query(Booking).filter(Booking.customer_id == user_id).all()
+            query = query.where(Booking.customer_id == user_id)
         else:
-            return self.db.query(Booking).filter(Booking.barber_id == user_id).all()
+            query = query.join(Booking.barber).where(Barber.user_id == user_id)
+        result = await self.db.execute(query)
+        return result.scalars().all()
+
+    async def get_barber_bookings(self, barber_id: int) -> List[Booking]:
+        result = await self.db.execute(
+            select(Booking).options(*debug_query_options()).where(Booking.barber_id == barber_id)
+        )
+        return result.scalars().all()
 
-    def update_booking_status(self, booking_id: int, new_status: BookingStatus, user_id: int) -> Booking:
-        booking = self.get_booking_by_id(booking_id)
+    async def update_booking_status(self, booking_id: int, new_status: BookingStatus, user_id: int) -> Booking:
+        booking = await self.get_booking_by_id(booking_id)
         if not booking:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -71,19 +119,29 @@ class BookingService:
             )
 
         # Only barber can update booking status
-        if booking.barber_id != user_id:
+        if booking.barber.user_id != user_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Only the barber can update booking status"
             )
 
         booking.status = new_status
-        self.db.commit()
-        self.db.refresh(booking)
+        try:
+            await self.db.flush()
+        except IntegrityError as e:
+            if getattr(e.orig, "sqlstate", None) != EXCLUSION_VIOLATION:
+                raise
+            # Reactivating a cancelled booking whose slot was taken meanwhile
+            await self.db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Requested time slot is not available"
+            )
+        self._invalidate_availability(booking)
         return booking
 
-    def cancel_booking(self, booking_id: int, user_id: int) -> Booking:
-        booking = self.get_booking_by_id(booking_id)
+    async def cancel_booking(self, booking_id: int, user_id: int) -> Booking:
+        booking = await self.get_booking_by_id(booking_id)
         if not booking:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -91,7 +149,7 @@ class BookingService:
             )
 
         # Only customer or barber can cancel their own bookings
-        if booking.customer_id != user_id and booking.barber_id != user_id:
+        if booking.customer_id != user_id and booking.barber.user_id != user_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not authorized to cancel this booking"
@@ -106,50 +164,39 @@ class BookingService:
             )
 
         booking.status = BookingStatus.CANCELLED
-        self.db.commit()
-        self.db.refresh(booking)
+        await self.db.flush()
+        self._invalidate_availability(booking)
         return booking
 
-    def _is_time_slot_available(self, barber_id: int, appointment_date: datetime, duration_minutes: int) -> bool:
-        # Check for overlapping bookings
-        end_time = appointment_date + timedelta(minutes=duration_minutes)
-        
-        overlapping_bookings = self.db.query(Booking).filter(
-            and_(
-                Booking.barber_id == barber_id,
-                Booking.status.in_([BookingStatus.PENDING, BookingStatus.CONFIRMED]),
-                or_(
-                    and_(
-                        Booking.appointment_date <= appointment_date,
-                        Booking.appointment_date + timedelta(minutes=Booking.duration_minutes) > appointment_date
-                    ),
-                    and_(
-                        Booking.appointment_date < end_time,
-                        Booking.appointment_date + timedelta(minutes=Booking.duration_minutes) >= end_time
-                    ),
-                    and_(
-                        Booking.appointment_date >= appointment_date,
-                        Booking.appointment_date + timedelta(minutes=Booking.duration_minutes) <= end_time
-                    )
-                )
-            )
-        ).count()
-
-        return overlapping_bookings == 0
+    def _invalidate_availability(self, booking: Booking) -> None:
+        start = booking.appointment_date
+        end = start + timedelta(minutes=booking.duration_minutes)
+        after_commit(self.db, delete_keys, *{
+            _availability_key(booking.barber_id, start),
+            _availability_key(booking.barber_id, end)
+        })
 
-    def get_barber_availability(self, barber_id: int, date: datetime) -> List[dict]:
-        # Get all bookings for the barber on the specified date
+    async def get_barber_availability(self, barber_id: int, date: datetime) -> List[dict]:
         start_of_day = date.replace(hour=0, minute=0, second=0, microsecond=0)
         end_of_day = start_of_day + timedelta(days=1)
         
-        bookings = self.db.query(Booking).filter(
-            and_(
-                Booking.barber_id == barber_id,
-                Booking.appointment_date >= start_of_day,
-                Booking.appointment_date < end_of_day,
-                Booking.status.in_([BookingStatus.PENDING, BookingStatus.CONFIRMED])
-            )
-        ).all()
+        cache_key = _availability_key(barber_id, start_of_day)
+        cached = await get_json(cache_key)
+        if isinstance(cached, str):
+            booked = int(cached, 16)
+        else:
+            # Build the day's bitmap from the barber's active bookings; only the
+            # interval columns are needed, so skip ORM entity loading
+            result = await self.db.execute(select(Booking.appointment_date, Booking.end_at).where(
+                and_(
+                    Booking.barber_id == barber_id,
+                    Booking.status.in_([BookingStatus.PENDING, BookingStatus.CONFIRMED]),
+                    Booking.appointment_date < end_of_day,
+                    Booking.end_at > start_of_day
+                )
+            ))
+            booked = _booked_mask(result.all(), start_of_day)
+            await set_json(cache_key, format(booked, "x"), settings.availability_cache_ttl)
 
         # Generate available time slots (assuming 9 AM to 6 PM working hours)
         available_slots = []
@@ -160,15 +207,8 @@ class BookingService:
             slot_start = start_of_day.replace(hour=hour, minute=0)
             slot_end = slot_start + timedelta(hours=1)
             
-            # Check if this slot conflicts with any booking
-            is_available = True
-            for booking in bookings:
-                booking_end = booking.appointment_date + timedelta(minutes=booking.duration_minutes)
-                if (slot_start < booking_end and slot_end > booking.appointment_date):
-                    is_available = False
-                    break
-            
-            if is_available:
+            # The slot is free when none of its 15-minute bits are booked
+            if (booked & _slot_mask(slot_start, slot_end, start_of_day)) == 0:
                 available_slots.append({
                     "start_time": slot_start,
                     "end_time": slot_end,
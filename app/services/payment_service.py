@@ -1,6 +1,13 @@
+import hashlib
+import hmac
+import time
+import orjson
 import stripe
-from typing import Optional, Dict, Any
-from sqlalchemy.orm import Session
+from cachetools import TTLCache
+from typing import Optional, Dict, Any, List, Tuple, Union
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.booking import Booking, PaymentStatus
 from app.core.config import settings
 from fastapi import HTTPException, status
@@ -8,26 +15,109 @@ from fastapi import HTTPException, status
 # Configure Stripe
 stripe.api_key = settings.stripe_secret_key
 
+# Same replay window as stripe.Webhook.construct_event
+WEBHOOK_TOLERANCE_SECONDS = 300
+
+# Keyed once at import; each event copies it instead of re-keying HMAC
+_WEBHOOK_MAC = hmac.new(settings.stripe_webhook_secret.encode(), digestmod=hashlib.sha256)
+
+# Recently retrieved payment intent statuses, so client polls and retries
+# within a few seconds reuse one Stripe round trip
+_intent_statuses = TTLCache(maxsize=4096, ttl=5)
+
+# Intents the customer can still pay; a booking holding one reuses it
+_REUSABLE_INTENT_STATUSES = frozenset({"requires_payment_method", "requires_confirmation", "requires_action"})
+
+
+async def _retrieve_intent_status(payment_intent_id: str) -> str:
+    cached = _intent_statuses.get(payment_intent_id)
+    if cached is None:
+        payment_intent = await run_in_threadpool(stripe.PaymentIntent.retrieve, payment_intent_id)
+        cached = _intent_statuses[payment_intent_id] = payment_intent.status
+    return cached
+
+
+def _parse_signature_header(sig_header: str) -> Tuple[int, List[str]]:
+    timestamp = None
+    signatures = []
+    for item in sig_header.split(","):
+        key, _, value = item.strip().partition("=")
+        if key == "t":
+            timestamp = value
+        elif key == "v1":
+            signatures.append(value)
+    if timestamp is None or not timestamp.isdigit() or not signatures:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid signature"
+        )
+    return int(timestamp), signatures
+
+
+class WebhookSignatureVerifier:
+    """Verifies a Stripe-Signature header incrementally over a streamed payload."""
+
+    def __init__(self, sig_header: str, keyed_mac: hmac.HMAC = _WEBHOOK_MAC, tolerance: int = WEBHOOK_TOLERANCE_SECONDS):
+        self.timestamp, self.signatures = _parse_signature_header(sig_header)
+        self.tolerance = tolerance
+        self._mac = keyed_mac.copy()
+        self._mac.update(f"{self.timestamp}.".encode())
+
+    def update(self, chunk: bytes) -> None:
+        self._mac.update(chunk)
+
+    def verify(self) -> bool:
+        if abs(time.time() - self.timestamp) > self.tolerance:
+            return False
+        expected = self._mac.hexdigest()
+        return any(hmac.compare_digest(expected, signature) for signature in self.signatures)
+
 
 class PaymentService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create_payment_intent(self, booking_id: int, amount: float, currency: str = "usd") -> Dict[str, Any]:
-        booking = self.db.query(Booking).filter(Booking.id == booking_id).first()
+    async def _resolve_booking(self, booking_or_id: Union[int, Booking]) -> Booking:
+        # Callers that already loaded the booking pass it in to skip the SELECT
+        if isinstance(booking_or_id, Booking):
+            return booking_or_id
+
+        booking = await self.db.get(Booking, booking_or_id)
         if not booking:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Booking not found"
             )
+        return booking
+
+    async def create_payment_intent(self, booking_or_id: Union[int, Booking], amount: float, currency: str = "usd") -> Dict[str, Any]:
+        booking = await self._resolve_booking(booking_or_id)
 
         try:
-            # Create payment intent with Stripe
-            payment_intent = stripe.PaymentIntent.create(
-                amount=int(amount * 100),  # Convert to cents
+            amount_cents = int(amount * 100)  # Convert to cents
+            # A retried request gets the booking's open intent back instead of
+            # a duplicate; a failed, cancelled or re-priced one is replaced
+            if booking.stripe_payment_intent_id:
+                payment_intent = await run_in_threadpool(
+                    stripe.PaymentIntent.retrieve, booking.stripe_payment_intent_id
+                )
+                if (
+                    payment_intent.status in _REUSABLE_INTENT_STATUSES
+                    and payment_intent.amount == amount_cents
+                    and payment_intent.currency == currency
+                ):
+                    return {
+                        "client_secret": payment_intent.client_secret,
+                        "payment_intent_id": payment_intent.id
+                    }
+
+            # Create payment intent with Stripe (blocking HTTP, run off the event loop)
+            payment_intent = await run_in_threadpool(
+                stripe.PaymentIntent.create,
+                amount=amount_cents,
                 currency=currency,
                 metadata={
-                    "booking_id": str(booking_id),
+                    "booking_id": str(booking.id),
                     "customer_id": str(booking.customer_id),
                     "barber_id": str(booking.barber_id)
                 }
@@ -35,7 +125,7 @@ class PaymentService:
 
             # Update booking with payment intent ID
             booking.stripe_payment_intent_id = payment_intent.id
-            self.db.commit()
+            await self.db.flush()
 
             return {
                 "client_secret": payment_intent.client_secret,
@@ -48,10 +138,11 @@ class PaymentService:
                 detail=f"Payment intent creation failed: {str(e)}"
             )
 
-    def confirm_payment(self, payment_intent_id: str) -> Booking:
-        booking = self.db.query(Booking).filter(
+    async def confirm_payment(self, payment_intent_id: str) -> Booking:
+        result = await self.db.execute(select(Booking).where(
             Booking.stripe_payment_intent_id == payment_intent_id
-        ).first()
+        ))
+        booking = result.scalars().first()
 
         if not booking:
             raise HTTPException(
@@ -59,15 +150,19 @@ class PaymentService:
                 detail="Booking not found for this payment"
             )
 
+        # Already confirmed (by an earlier call or the webhook)
+        if booking.payment_status == PaymentStatus.PAID:
+            return booking
+
         try:
-            # Retrieve payment intent from Stripe
-            payment_intent = stripe.PaymentIntent.retrieve(payment_intent_id)
+            # Retrieve payment intent status from Stripe
+            intent_status = await _retrieve_intent_status(payment_intent_id)
 
-            if payment_intent.status == "succeeded":
+            if intent_status == "succeeded":
                 booking.payment_status = PaymentStatus.PAID
-                self.db.commit()
+                await self.db.flush()
                 return booking
-            elif payment_intent.status == "requires_payment_method":
+            elif intent_status == "requires_payment_method":
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Payment requires additional authentication"
@@ -75,7 +170,7 @@ class PaymentService:
             else:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Payment failed with status: {payment_intent.status}"
+                    detail=f"Payment failed with status: {intent_status}"
                 )
 
         except stripe.error.StripeError as e:
@@ -84,69 +179,63 @@ class PaymentService:
                 detail=f"Payment confirmation failed: {str(e)}"
             )
 
-    def process_webhook(self, payload: bytes, sig_header: str) -> Dict[str, Any]:
-        try:
-            event = stripe.Webhook.construct_event(
-                payload, sig_header, settings.stripe_webhook_secret
-            )
-        except ValueError as e:
+    def webhook_verifier(self, sig_header: str) -> WebhookSignatureVerifier:
+        return WebhookSignatureVerifier(sig_header)
+
+    async def process_webhook(self, payload: bytes, verifier: WebhookSignatureVerifier) -> Dict[str, Any]:
+        # The verifier has already been fed the payload as it was streamed in
+        if not verifier.verify():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid payload"
+                detail="Invalid signature"
             )
-        except stripe.error.SignatureVerificationError as e:
+        try:
+            event = orjson.loads(payload)
+        except orjson.JSONDecodeError:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid signature"
+                detail="Invalid payload"
             )
 
         # Handle the event
         if event["type"] == "payment_intent.succeeded":
             payment_intent = event["data"]["object"]
-            return self._handle_payment_success(payment_intent)
+            return await self._handle_payment_success(payment_intent)
         elif event["type"] == "payment_intent.payment_failed":
             payment_intent = event["data"]["object"]
-            return self._handle_payment_failure(payment_intent)
+            return await self._handle_payment_failure(payment_intent)
         else:
             return {"status": "ignored", "event_type": event["type"]}
 
-    def _handle_payment_success(self, payment_intent: Dict[str, Any]) -> Dict[str, Any]:
-        booking = self.db.query(Booking).filter(
-            Booking.stripe_payment_intent_id == payment_intent["id"]
-        ).first()
-
-        if booking:
-            booking.payment_status = PaymentStatus.PAID
-            self.db.commit()
+    async def _set_payment_status(self, payment_intent_id: str, payment_status: PaymentStatus) -> Optional[int]:
+        # One UPDATE ... RETURNING instead of loading the booking first
+        result = await self.db.execute(
+            update(Booking)
+            .where(Booking.stripe_payment_intent_id == payment_intent_id)
+            .values(payment_status=payment_status)
+            .returning(Booking.id)
+            .execution_options(synchronize_session=False)
+        )
+        return result.scalar()
 
+    async def _handle_payment_success(self, payment_intent: Dict[str, Any]) -> Dict[str, Any]:
+        booking_id = await self._set_payment_status(payment_intent["id"], PaymentStatus.PAID)
         return {
             "status": "success",
-            "booking_id": booking.id if booking else None,
+            "booking_id": booking_id,
             "payment_intent_id": payment_intent["id"]
         }
 
-    def _handle_payment_failure(self, payment_intent: Dict[str, Any]) -> Dict[str, Any]:
-        booking = self.db.query(Booking).filter(
-            Booking.stripe_payment_intent_id == payment_intent["id"]
-        ).first()
-
-        if booking:
-            booking.payment_status = PaymentStatus.FAILED
-            self.db.commit()
-
+    async def _handle_payment_failure(self, payment_intent: Dict[str, Any]) -> Dict[str, Any]:
+        booking_id = await self._set_payment_status(payment_intent["id"], PaymentStatus.FAILED)
         return {
             "status": "failed",
-            "booking_id": booking.id if booking else None,
+            "booking_id": booking_id,
             "payment_intent_id": payment_intent["id"]
         }
 
-    def refund_payment(self, booking_id: int) -> Dict[str, Any]:
-        booking = self.db.query(Booking).filter(Booking.id == booking_id).first()
-        if not booking:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Booking not found"
-            )
+    async def refund_payment(self, booking_or_id: Union[int, Booking]) -> Dict[str, Any]:
+        booking = await self._resolve_booking(booking_or_id)
 
         if not booking.stripe_payment_intent_id:
             raise HTTPException(
@@ -156,13 +245,14 @@ class PaymentService:
 
         try:
             # Create refund
-            refund = stripe.Refund.create(
+            refund = await run_in_threadpool(
+                stripe.Refund.create,
                 payment_intent=booking.stripe_payment_intent_id
             )
 
             if refund.status == "succeeded":
                 booking.payment_status = PaymentStatus.REFUNDED
-                self.db.commit()
+                await self.db.flush()
 
             return {
                 "status": "success",
@@ -0,0 +1,66 @@
+import asyncio
+from datetime import datetime
+from app.core import cache
+from app.services.booking_service import BookingService
+
+
+class FakeRedis:
+    """Just enough of the decode_responses client for get_json/set_json."""
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value.decode() if isinstance(value, bytes) else value
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    async def execute(self, statement):
+        self.queries += 1
+        return FakeResult(self.rows)
+
+
+def test_late_evening_booking_round_trips_through_cache(monkeypatch):
+    fake_redis = FakeRedis()
+    monkeypatch.setattr(cache, "redis_client", fake_redis)
+
+    day = datetime(2024, 5, 1)
+    # 17:00-18:00 sets bits 68-71, past the 64-bit range orjson can encode
+    db = FakeSession([(day.replace(hour=17), day.replace(hour=18))])
+    service = BookingService(db)
+
+    first = asyncio.run(service.get_barber_availability(1, day))
+    assert fake_redis.store, "availability bitmap was not cached"
+
+    second = asyncio.run(service.get_barber_availability(1, day))
+    assert db.queries == 1
+    assert second == first
+
+    free_hours = {slot["start_time"].hour for slot in second}
+    assert 17 not in free_hours
+    assert 16 in free_hours
+
+
+def test_unencodable_value_is_logged_not_cached(monkeypatch, caplog):
+    fake_redis = FakeRedis()
+    monkeypatch.setattr(cache, "redis_client", fake_redis)
+
+    asyncio.run(cache.set_json("avail:1:20240501", 1 << 70, 60))
+
+    assert not fake_redis.store
+    assert "avail:1:20240501" in caplog.text
\ No newline at end of file
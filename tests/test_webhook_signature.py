@@ -0,0 +1,64 @@
+import hashlib
+import hmac
+import time
+import pytest
+from fastapi import HTTPException
+from app.services.payment_service import WebhookSignatureVerifier
+
+SECRET = b"whsec_test"
+KEYED_MAC = hmac.new(SECRET, digestmod=hashlib.sha256)
+PAYLOAD = b'{"id": "evt_1", "type": "payment_intent.succeeded", "data": {"object": {}}}'
+
+
+def sign(payload: bytes, timestamp: int) -> str:
+    signature = hmac.new(SECRET, f"{timestamp}.".encode() + payload, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def verify(sig_header: str, chunks) -> bool:
+    verifier = WebhookSignatureVerifier(sig_header, keyed_mac=KEYED_MAC)
+    for chunk in chunks:
+        verifier.update(chunk)
+    return verifier.verify()
+
+
+def test_valid_signature_over_chunked_body():
+    header = sign(PAYLOAD, int(time.time()))
+    chunks = [PAYLOAD[i:i + 7] for i in range(0, len(PAYLOAD), 7)]
+    assert verify(header, chunks)
+
+
+def test_any_matching_v1_is_accepted():
+    timestamp = int(time.time())
+    header = f"t={timestamp},v1={'0' * 64}," + sign(PAYLOAD, timestamp).split(",")[1]
+    assert verify(header, [PAYLOAD])
+
+
+def test_tampered_body_is_rejected():
+    header = sign(PAYLOAD, int(time.time()))
+    assert not verify(header, [PAYLOAD.replace(b"evt_1", b"evt_2")])
+
+
+def test_stale_timestamp_is_rejected():
+    header = sign(PAYLOAD, int(time.time()) - 3600)
+    assert not verify(header, [PAYLOAD])
+
+
+def test_keyed_mac_is_not_consumed():
+    header = sign(PAYLOAD, int(time.time()))
+    assert verify(header, [PAYLOAD])
+    assert verify(header, [PAYLOAD])
+
+
+@pytest.mark.parametrize("sig_header", [
+    "",
+    "v1=abc",
+    "t=,v1=abc",
+    "t=12ab,v1=abc",
+    "t=1700000000",
+    "t=1700000000,v0=abc",
+])
+def test_malformed_header_is_rejected(sig_header):
+    with pytest.raises(HTTPException) as exc_info:
+        WebhookSignatureVerifier(sig_header, keyed_mac=KEYED_MAC)
+    assert exc_info.value.status_code == 400